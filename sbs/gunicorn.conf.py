@@ -0,0 +1,23 @@
+# Gunicorn picks this file up automatically when started from this directory,
+# e.g. `gunicorn sbs.wsgi`.
+import os
+
+
+def post_fork(server, worker):
+    """Warm each new worker before it accepts requests."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sbs.settings')
+    import django
+    django.setup()
+
+    from django.db import connections
+
+    # With preload_app the parent's connections would be shared across forks
+    connections.close_all()
+    try:
+        from main.warmup import warm_up
+        warm_up()
+    except Exception:
+        # Warm-up is only an optimisation: a failure here (pending migrations,
+        # a locked database, a broken page) must not stop the worker booting
+        worker.log.exception("Warm-up failed; worker %s will start cold", worker.pid)
+        connections.close_all()
@@ -0,0 +1,243 @@
+"""
+Archival of old Order and Contacts rows.
+
+Rows are written to one gzip file per model and month under
+settings.ARCHIVE_ROOT. Each line in a file holds one batch in columnar
+form ({"columns": {name: [values, ...]}}), appended as its own gzip member,
+so files can be extended without rewriting them. manifest.json records the
+row count, id range and committed size of every file: id lookups open a
+single file, and bytes past the committed size (a batch torn by a crash)
+are truncated before the next run appends. Next to each file,
+<month>.emails.json holds short hashes of the email addresses in it, so
+email lookups only open the months that can match.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, Contacts
+
+# model key -> (model, date field, archived columns)
+ARCHIVED_MODELS = {
+    'orders': (Order, 'order_date', [
+        'id', 'full_name', 'email', 'phone_number', 'street_address', 'city', 'pincode',
+        'product_id', 'product__name', 'total_price', 'order_date',
+    ]),
+    'contacts': (Contacts, 'submitted_at', [
+        'id', 'name', 'email', 'subject', 'message', 'submitted_at',
+    ]),
+}
+
+
+def archive_root():
+    return Path(settings.ARCHIVE_ROOT)
+
+
+def load_manifest():
+    path = archive_root() / 'manifest.json'
+    if not path.exists():
+        return {key: {'last_id': 0, 'pending_ids': [], 'files': {}} for key in ARCHIVED_MODELS}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest):
+    path = archive_root() / 'manifest.json'
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _discard_uncommitted(folder, entry):
+    """Truncates every month file back to the size the manifest last recorded."""
+    for path in folder.glob('*.jsonl.gz'):
+        info = entry['files'].get(path.name[:-len('.jsonl.gz')])
+        if info is None:
+            committed = 0  # created by a run that crashed before saving the manifest
+        elif 'bytes' in info:
+            committed = info['bytes']
+        else:
+            continue  # written before sizes were recorded
+        if path.stat().st_size > committed:
+            with open(path, 'r+b') as f:
+                f.truncate(committed)
+                os.fsync(f.fileno())
+
+
+def _email_key(email):
+    return hashlib.blake2b((email or '').strip().lower().encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _email_index_path(folder, month):
+    return folder / f'{month}.emails.json'
+
+
+def _load_email_index(path):
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return set(json.load(f))
+
+
+def _save_email_index(path, keys):
+    # Written before the manifest: after a crash it can only list too many
+    # addresses, which costs a wasted file read but never a missed row
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(sorted(keys), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _append_batch(path, columns, rows):
+    data = {name: [row[name] for row in rows] for name in columns}
+    line = json.dumps({'columns': data}, cls=DjangoJSONEncoder) + '\n'
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='ab') as f:
+            f.write(line.encode('utf-8'))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_model(key, before, batch_size=1000, stdout=None):
+    """
+    Streams rows of `key` created before `before` into the monthly archive
+    files and deletes them, one batch per transaction. Returns the number
+    of rows archived.
+    """
+    model, date_field, columns = ARCHIVED_MODELS[key]
+    manifest = load_manifest()
+    entry = manifest.setdefault(key, {'last_id': 0, 'pending_ids': [], 'files': {}})
+    folder = archive_root() / key
+    folder.mkdir(parents=True, exist_ok=True)
+
+    old_rows = model.objects.filter(**{f'{date_field}__lt': before})
+    _discard_uncommitted(folder, entry)
+
+    # Rows already written by an interrupted run only need deleting
+    if entry.get('pending_ids'):
+        with transaction.atomic():
+            model.objects.filter(id__in=entry['pending_ids']).delete()
+        entry['pending_ids'] = []
+        _save_manifest(manifest)
+
+    email_indexes = {}
+    total = 0
+    while True:
+        rows = list(old_rows.order_by('id').values(*columns)[:batch_size])
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            month = timezone.localtime(row[date_field]).strftime('%Y-%m')
+            by_month.setdefault(month, []).append(row)
+
+        for month, month_rows in by_month.items():
+            name = f'{month}.jsonl.gz'
+            _append_batch(folder / name, columns, month_rows)
+            info = entry['files'].setdefault(month, {'file': f'{key}/{name}', 'rows': 0, 'min_id': None, 'max_id': None})
+            ids = [row['id'] for row in month_rows]
+            info['rows'] += len(month_rows)
+            info['min_id'] = min(ids) if info['min_id'] is None else min(info['min_id'], min(ids))
+            info['max_id'] = max(ids) if info['max_id'] is None else max(info['max_id'], max(ids))
+            info['bytes'] = (folder / name).stat().st_size
+            index_path = _email_index_path(folder, month)
+            if month not in email_indexes:
+                email_indexes[month] = _load_email_index(index_path) or set()
+            email_indexes[month].update(_email_key(row['email']) for row in month_rows)
+            _save_email_index(index_path, email_indexes[month])
+
+        # Record progress before deleting so a crash never loses rows
+        ids = [row['id'] for row in rows]
+        entry['last_id'] = ids[-1]
+        entry['pending_ids'] = ids
+        _save_manifest(manifest)
+        with transaction.atomic():
+            model.objects.filter(id__in=ids).delete()
+        entry['pending_ids'] = []
+
+        _save_manifest(manifest)
+        total += len(rows)
+        if stdout:
+            stdout.write(f"  {key}: archived {total} rows (up to id {entry['last_id']})")
+    return total
+
+
+class _CommittedBytes(io.RawIOBase):
+    """Read-only view of the first `limit` bytes of a file, hiding a torn trailing batch."""
+
+    def __init__(self, f, limit):
+        self.f = f
+        self.remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        data = self.f.read(size) if size > 0 else b''
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def iter_archive(key, months=None):
+    """Yields archived rows of `key` as dicts, optionally only for the given 'YYYY-MM' months."""
+    entry = load_manifest().get(key, {'files': {}})
+    for month, info in sorted(entry['files'].items()):
+        if months is not None and month not in months:
+            continue
+        path = archive_root() / info['file']
+        with open(path, 'rb') as raw:
+            committed = _CommittedBytes(raw, info.get('bytes', path.stat().st_size))
+            f = io.TextIOWrapper(gzip.GzipFile(fileobj=io.BufferedReader(committed)), encoding='utf-8')
+            for line in f:
+                data = json.loads(line)['columns']
+                names = list(data)
+                for values in zip(*data.values()):
+                    yield dict(zip(names, values))
+
+
+def find_order(order_id):
+    """Returns the archived order with this id, or None."""
+    entry = load_manifest().get('orders', {'files': {}})
+    months = [
+        month for month, info in entry['files'].items()
+        if info['min_id'] is not None and info['min_id'] <= order_id <= info['max_id']
+    ]
+    for row in iter_archive('orders', months):
+        if row['id'] == order_id:
+            return row
+    return None
+
+
+def find_by_email(email, key=None):
+    """Returns archived orders and/or contact messages for an email address."""
+    email = email.strip().lower()
+    wanted = _email_key(email)
+    manifest = load_manifest()
+    keys = [key] if key else list(ARCHIVED_MODELS)
+    results = {}
+    for k in keys:
+        folder = archive_root() / k
+        months = []
+        for month in manifest.get(k, {'files': {}})['files']:
+            index = _load_email_index(_email_index_path(folder, month))
+            # Files archived before indexes were written have to be read
+            if index is None or wanted in index:
+                months.append(month)
+        results[k] = [row for row in iter_archive(k, months) if (row['email'] or '').lower() == email]
+    return results
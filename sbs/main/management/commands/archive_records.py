@@ -0,0 +1,30 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from main import archive
+
+
+class Command(BaseCommand):
+    help = "Moves Orders and Contacts older than a cutoff into compressed monthly archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help="Archive rows created before this date (YYYY-MM-DD)")
+        parser.add_argument('--model', choices=[*archive.ARCHIVED_MODELS, 'all'], default='all')
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows written and deleted per transaction")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        try:
+            cutoff = datetime.fromisoformat(options['before']).date()
+        except ValueError:
+            raise CommandError("--before must be a date in YYYY-MM-DD format.")
+        before = timezone.make_aware(datetime.combine(cutoff, time.min))
+
+        keys = list(archive.ARCHIVED_MODELS) if options['model'] == 'all' else [options['model']]
+        for key in keys:
+            total = archive.archive_model(key, before, batch_size=options['batch_size'], stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(f"Archived {total} {key} rows to {archive.archive_root() / key}."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recomputes the 'similar devices' neighbour table for the whole catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=recommendations.TOP_K, help="Neighbours stored per product")
+
+    def handle(self, *args, **options):
+        count = recommendations.rebuild(k=options['k'])
+        self.stdout.write(self.style.SUCCESS(f"Computed neighbours for {count} products."))
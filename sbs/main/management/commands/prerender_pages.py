@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main import prerender
+
+
+class Command(BaseCommand):
+    help = "Renders the catalog and every product detail page to PRERENDER_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Number of render threads")
+
+    def handle(self, *args, **options):
+        written = prerender.render_all(workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} pages to {prerender.prerender_root()}."))
@@ -0,0 +1,42 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Deletes expired sessions in small batches so SQLite never holds a long write lock."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows deleted per transaction")
+        parser.add_argument('--pause', type=float, default=0.05, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['pause'] < 0:
+            raise CommandError("--pause cannot be negative.")
+
+        batch_size = options['batch_size']
+        pause = options['pause']
+        now = timezone.now()
+        total = 0
+
+        while True:
+            # Each batch is its own short transaction; other writers get the lock in between.
+            with transaction.atomic():
+                keys = list(
+                    Session.objects.filter(expire_date__lt=now)
+                    .values_list('session_key', flat=True)[:batch_size]
+                )
+                if not keys:
+                    break
+                deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            if len(keys) < batch_size:
+                break
+            time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired sessions."))
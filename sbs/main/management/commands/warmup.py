@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Pre-compiles templates, loads URL patterns, opens DB connections and renders the catalog once."
+
+    def handle(self, *args, **options):
+        warm_up(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS("Warm-up complete."))
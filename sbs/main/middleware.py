@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class PrerenderedPageMiddleware(WhiteNoise):
+    """
+    Serves pages written by main.prerender straight from PRERENDER_ROOT,
+    before sessions, auth or URL routing run. Requests the static copy
+    cannot answer (filters in the query string, pending flash messages,
+    anything other than GET/HEAD, pages not on disk) go to the views.
+    """
+    serve = staticmethod(WhiteNoiseMiddleware.serve)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # autorefresh re-stats files per request, so regenerated pages are
+        # never served with stale length or ETag headers
+        super().__init__(
+            application=None,
+            autorefresh=True,
+            max_age=0,
+            index_file=True,
+            # The dynamic views send no CORS headers, so neither should their static copies
+            allow_all_origins=False,
+            add_headers_function=self.add_page_headers,
+        )
+        self.add_files(settings.PRERENDER_ROOT)
+
+    @staticmethod
+    def add_page_headers(headers, path, url):
+        """Headers the middleware skipped by answering early would have added."""
+        # XFrameOptionsMiddleware
+        headers['X-Frame-Options'] = getattr(settings, 'X_FRAME_OPTIONS', 'DENY').upper()
+        # The dynamic view answers instead when a messages cookie is present
+        headers['Vary'] = 'Cookie'
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and not request.META.get('QUERY_STRING')
+            and CookieStorage.cookie_name not in request.COOKIES
+        ):
+            static_file = self.find_file(request.path_info)
+            if static_file is not None:
+                return self.serve(static_file, request)
+        return self.get_response(request)
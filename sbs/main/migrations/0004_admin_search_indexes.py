@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+# The admin searches these columns with case-insensitive LIKE, which SQLite
+# can only answer from an index built with the NOCASE collation. The
+# collation is kept to the index, so equality lookups elsewhere stay
+# case-sensitive, and other backends (which have no NOCASE) skip it.
+NOCASE_INDEXES = [
+    ('main_product_name_nocase', 'main_product', 'name'),
+    ('main_product_brand_nocase', 'main_product', 'brand'),
+    ('main_order_full_name_nocase', 'main_order', 'full_name'),
+    ('main_order_email_nocase', 'main_order', 'email'),
+]
+
+
+def create_nocase_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    quote = schema_editor.quote_name
+    for name, table, column in NOCASE_INDEXES:
+        schema_editor.execute(f'CREATE INDEX {quote(name)} ON {quote(table)} ({quote(column)} COLLATE NOCASE)')
+
+
+def drop_nocase_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, column in NOCASE_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_alter_product_slug'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='order_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='brand',
+            field=models.CharField(db_index=True, help_text="Brand name (e.g., 'Dell', 'Apple')", max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(db_index=True, help_text="Full product name (e.g., 'Dell XPS 13 2021')", max_length=300),
+        ),
+        migrations.RunPython(create_nocase_indexes, drop_nocase_indexes),
+    ]
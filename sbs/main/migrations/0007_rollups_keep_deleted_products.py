@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_product_details(apps, schema_editor):
+    DailyProductSales = apps.get_model('main', 'DailyProductSales')
+    Product = apps.get_model('main', 'Product')
+    for product in Product.objects.filter(daily_sales__isnull=False).distinct().only('name', 'category'):
+        DailyProductSales.objects.filter(product=product).update(product_name=product.name, category=product.category)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_product_neighbours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyproductsales',
+            name='product_name',
+            field=models.CharField(default='', max_length=300),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='dailyproductsales',
+            name='category',
+            field=models.CharField(choices=[('laptop', 'Laptop'), ('desktop', 'Desktop'), ('tablet', 'Tablet'), ('smartphone', 'Smartphone'), ('accessory', 'Accessory')], default='laptop', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='dailyproductsales',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='main.product'),
+        ),
+        migrations.RunPython(copy_product_details, migrations.RunPython.noop),
+    ]
@@ -36,8 +36,8 @@ class Image(models.Model):
 
 class Product(models.Model):
     # Core Details
-    name = models.CharField(max_length=300, help_text="Full product name (e.g., 'Dell XPS 13 2021')")
-    brand = models.CharField(max_length=200, help_text="Brand name (e.g., 'Dell', 'Apple')")
+    name = models.CharField(max_length=300, db_index=True, help_text="Full product name (e.g., 'Dell XPS 13 2021')")
+    brand = models.CharField(max_length=200, db_index=True, help_text="Brand name (e.g., 'Dell', 'Apple')")
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='laptop', help_text="Product category")
     # Pricing & Description
     price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Price in rupees (e.g., 99999.99)")
@@ -76,6 +76,20 @@ class Product(models.Model):
             self.slug = unique_slug
         super().save(*args, **kwargs)
 
+class ProductNeighbour(models.Model):
+    """Precomputed 'similar devices' for a product, maintained by main.recommendations."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = [('product', 'rank')]
+        ordering = ['product', 'rank']
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.neighbour_id} (#{self.rank})"
+
 class Contacts(models.Model):
     name = models.CharField(max_length=200)
     email = models.EmailField()
@@ -88,6 +102,7 @@ class Contacts(models.Model):
     
 class Order(models.Model):
     # Customer Information
+    # Searched case-insensitively in the admin through NOCASE indexes (migration 0004)
     full_name = models.CharField(max_length=200)
     email = models.EmailField()
     phone_number = models.CharField(max_length=20)
@@ -98,35 +113,167 @@ class Order(models.Model):
     # Order Details
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='orders')
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
-    order_date = models.DateTimeField(auto_now_add=True)
+    order_date = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"Order #{self.id} - {self.full_name}"
+
+
+# Sales rollups: one row per day and dimension, kept current by main.signals
+class DailyProductSales(models.Model):
+    date = models.DateField()
+    # Kept when the product is deleted: its orders lose the product too, so
+    # a rebuild could never restore this history
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='daily_sales')
+    product_name = models.CharField(max_length=300)
+    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [('date', 'product')]
+        ordering = ['-date']
+        verbose_name = 'Daily product sales'
+        verbose_name_plural = 'Sales dashboard'
+
+    def __str__(self):
+        return f"{self.date} - {self.product_name}"
+
+class DailyCategorySales(models.Model):
+    date = models.DateField()
+    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [('date', 'category')]
+        ordering = ['-date']
+        verbose_name = 'Daily category sales'
+        verbose_name_plural = 'Daily category sales'
+
+    def __str__(self):
+        return f"{self.date} - {self.category}"
+
+class DailyCitySales(models.Model):
+    date = models.DateField()
+    city = models.CharField(max_length=100)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [('date', 'city')]
+        ordering = ['-date']
+        verbose_name = 'Daily city sales'
+        verbose_name_plural = 'Daily city sales'
+
+    def __str__(self):
+        return f"{self.date} - {self.city}"
     
 from django.contrib import admin
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class BrandListFilter(admin.SimpleListFilter):
+    """
+    Brand filter whose choices come from the cache instead of a SELECT
+    DISTINCT per page load. Only a shared cache is used: with a per-process
+    LocMemCache, clearing the entry after a save would only reach one worker.
+    """
+    title = 'brand'
+    parameter_name = 'brand'
+    cache_key = 'admin:product_brands'
+    cache_timeout = 60 * 15
+
+    def lookups(self, request, model_admin):
+        def load():
+            return list(Product.objects.order_by('brand').values_list('brand', flat=True).distinct())
+
+        if isinstance(caches['default'], LocMemCache):
+            brands = load()
+        else:
+            brands = cache.get_or_set(self.cache_key, load, self.cache_timeout)
+        return [(brand, brand) for brand in brands]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(brand=self.value())
+        return queryset
+
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'brand', 'category', 'price', 'os')
-    search_fields = ('name', 'brand', 'category', 'os')
-    list_filter = ('category', 'os', 'brand')
+    # Prefix lookups on the NOCASE-indexed columns only (migration 0004): an
+    # unindexed column in the OR would scan the table. Category and OS have list filters.
+    search_fields = ('^name', '^brand')
+    list_filter = ('category', 'os', BrandListFilter)
     prepopulated_fields = {'slug': ('name',)}
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        cache.delete(BrandListFilter.cache_key)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        cache.delete(BrandListFilter.cache_key)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        cache.delete(BrandListFilter.cache_key)
 
 @admin.register(Contacts)
 class ContactsAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'subject', 'submitted_at')
     search_fields = ('name', 'email', 'subject')
     list_filter = ('submitted_at',)
+    show_full_result_count = False
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'full_name', 'email', 'product', 'total_price', 'order_date')
-    search_fields = ('full_name', 'email', 'product__name')
+    search_fields = ('=email', '^full_name')
+    # A static date filter (range lookups on the indexed column) rather than
+    # date_hierarchy, whose SELECT DISTINCT over a per-row SQLite UDF scans the table
     list_filter = ('order_date', 'product__category')
+    list_select_related = ('product',)
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # A '=id' search field compares the id with LIKE, which no index can serve
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        if term.isdigit():
+            results |= queryset.filter(pk=int(term))
+        return results, may_have_duplicates
 
 @admin.register(Image)
 class ImageAdmin(admin.ModelAdmin):
     list_display = ('product', 'alt_text', 'is_main')
     search_fields = ('product__name', 'alt_text')
     list_filter = ('is_main',)
-    
+    list_select_related = ('product',)
+
+
+@admin.register(DailyProductSales)
+class SalesDashboardAdmin(admin.ModelAdmin):
+    """Read-only sales reports built from the rollup tables, never from raw orders."""
+    change_list_template = 'admin/main/sales_dashboard.html'
+    list_display = ('date', 'product_name', 'category', 'order_count', 'revenue')
+    list_filter = ('date',)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        from .rollups import sales_summary
+        extra_context = {**(extra_context or {}), **sales_summary()}
+        return super().changelist_view(request, extra_context=extra_context)
@@ -0,0 +1,128 @@
+"""
+Static pre-rendering of the catalog and product detail pages.
+
+Pages are rendered through the normal views and written to
+settings.PRERENDER_ROOT as <url>/index.html, where PrerenderedPageMiddleware
+serves them before Django's URL routing runs. Anything not on disk falls
+through to the dynamic views.
+"""
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from .models import Product
+
+
+def prerender_root():
+    return Path(settings.PRERENDER_ROOT)
+
+
+def _page_dir(url):
+    return prerender_root() / url.lstrip('/')
+
+
+def _write(url, content):
+    folder = _page_dir(url)
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp = folder / 'index.html.tmp'
+    tmp.write_bytes(content)
+    # Replace in one step so the middleware never serves a half-written page
+    os.replace(tmp, folder / 'index.html')
+
+
+def render_catalog():
+    # Imported lazily: main.signals loads this module at startup, and django.test is heavy
+    from django.test import RequestFactory
+    from . import views
+
+    url = reverse('main:device_list')
+    response = views.device_list(RequestFactory().get(url))
+    _write(url, response.content)
+
+
+def render_product(slug):
+    from django.test import RequestFactory
+    from . import views
+
+    url = reverse('main:device_detail', args=[slug])
+    response = views.device_detail(RequestFactory().get(url), slug=slug)
+    _write(url, response.content)
+
+
+def remove_product(slug):
+    shutil.rmtree(_page_dir(reverse('main:device_detail', args=[slug])), ignore_errors=True)
+
+
+def discard_pages(product_ids=(), slugs=(), catalog=True):
+    """
+    Removes pages that could not be re-rendered, so requests fall back to
+    the dynamic views instead of being served a stale copy.
+    """
+    slugs = set(slugs)
+    if product_ids:
+        slugs.update(Product.objects.filter(pk__in=product_ids).values_list('slug', flat=True))
+    for slug in slugs:
+        if slug:
+            remove_product(slug)
+    if catalog:
+        (_page_dir(reverse('main:device_list')) / 'index.html').unlink(missing_ok=True)
+
+
+def _render_products(slugs):
+    """
+    Renders a chunk of detail pages. Runs in a worker thread: template
+    rendering holds the GIL, so threads only overlap the DB reads and file
+    writes, not the rendering itself.
+    """
+    try:
+        for slug in slugs:
+            render_product(slug)
+        return len(slugs)
+    finally:
+        connection.close()
+
+
+def _remove_stale_products():
+    """
+    Drops detail pages whose slug no longer exists. Signals cover normal
+    saves, but not queryset.update(), fixtures or a failed re-render.
+    """
+    folder = _page_dir(reverse('main:device_detail', args=['-'])).parent
+    if not folder.is_dir():
+        return
+    # Read after rendering, so products created meanwhile keep their pages
+    slugs = set(Product.objects.exclude(slug='').values_list('slug', flat=True))
+    for page in folder.iterdir():
+        if page.is_dir() and page.name not in slugs:
+            shutil.rmtree(page, ignore_errors=True)
+
+
+def render_all(workers=4, chunk_size=50):
+    """
+    Renders the catalog and every product page, and removes pages of
+    products that no longer exist. Returns the number of pages written.
+    """
+    slugs = list(Product.objects.exclude(slug='').values_list('slug', flat=True))
+    chunks = [slugs[i:i + chunk_size] for i in range(0, len(slugs), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        written = sum(pool.map(_render_products, chunks))
+    render_catalog()
+    _remove_stale_products()
+    return written + 1
+
+
+def refresh_products(product_ids, removed_slugs=(), catalog=True):
+    """Re-renders the given products' pages (and the catalog), and drops pages for removed slugs."""
+    for slug in removed_slugs:
+        if slug:
+            remove_product(slug)
+    slugs = Product.objects.filter(pk__in=product_ids).exclude(slug='').values_list('slug', flat=True)
+    for slug in slugs:
+        render_product(slug)
+    if catalog:
+        render_catalog()
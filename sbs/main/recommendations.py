@@ -0,0 +1,172 @@
+"""
+"Similar devices" recommendations.
+
+Every product's specs are encoded into one row of a numeric feature
+matrix. Cosine similarity between rows is computed in batches with NumPy,
+and the top-k neighbours of each product are stored in ProductNeighbour,
+so the detail page needs a single indexed query.
+"""
+import math
+import re
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from .models import Product, ProductNeighbour
+
+TOP_K = 6
+BATCH_SIZE = 1024
+
+# How much each group of features counts towards similarity
+WEIGHTS = {
+    'category': 3.0,
+    'brand': 1.5,
+    'os': 1.0,
+    'processor': 1.0,
+    'price': 2.0,
+    'ram': 1.0,
+}
+
+SPEC_FIELDS = ('id', 'category', 'brand', 'os', 'processor', 'price', 'ram_gb')
+
+
+def _ram_gb(value):
+    """ram_gb is free text ('16GB', '8 GB LPDDR5'), so take the first number in it."""
+    match = re.search(r'\d+(\.\d+)?', value or '')
+    return float(match.group()) if match else 0.0
+
+
+def _processor_tokens(value):
+    return set(re.findall(r'[a-z]+\d*|\d+', (value or '').lower()))
+
+
+def _one_hot(values, weight):
+    vocab = {v: i for i, v in enumerate(sorted(set(values)))}
+    block = np.zeros((len(values), len(vocab)), dtype=np.float32)
+    block[np.arange(len(values)), [vocab[v] for v in values]] = weight
+    return block
+
+
+def _multi_hot(token_sets, weight):
+    vocab = {t: i for i, t in enumerate(sorted(set().union(*token_sets)))}
+    block = np.zeros((len(token_sets), len(vocab)), dtype=np.float32)
+    for row, tokens in enumerate(token_sets):
+        if tokens:
+            block[row, [vocab[t] for t in tokens]] = weight / math.sqrt(len(tokens))
+    return block
+
+
+def _scaled(values, weight):
+    column = np.asarray(values, dtype=np.float32)
+    spread = column.std()
+    column = (column - column.mean()) / spread if spread else np.zeros_like(column)
+    return (column * weight)[:, None]
+
+
+def build_features():
+    """Returns (product ids, L2-normalised feature matrix) for the whole catalog."""
+    rows = list(Product.objects.order_by('id').values_list(*SPEC_FIELDS))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+    ids, categories, brands, systems, processors, prices, rams = zip(*rows)
+
+    matrix = np.hstack([
+        _one_hot(categories, WEIGHTS['category']),
+        _one_hot([b.strip().lower() for b in brands], WEIGHTS['brand']),
+        _one_hot(systems, WEIGHTS['os']),
+        _multi_hot([_processor_tokens(p) for p in processors], WEIGHTS['processor']),
+        _scaled([math.log1p(float(p)) for p in prices], WEIGHTS['price']),
+        _scaled([math.log2(1 + _ram_gb(r)) for r in rams], WEIGHTS['ram']),
+    ])
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    return np.asarray(ids, dtype=np.int64), matrix
+
+
+def _top_k(ids, matrix, rows, k):
+    """Yields ProductNeighbour objects for the given row indexes, BATCH_SIZE rows at a time."""
+    k = min(k, len(ids) - 1)
+    if k <= 0:
+        return
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        scores = matrix[batch] @ matrix.T
+        scores[np.arange(len(batch)), batch] = -np.inf  # never recommend the product itself
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for i, row in enumerate(batch):
+            for rank in range(k):
+                yield ProductNeighbour(
+                    product_id=int(ids[row]),
+                    neighbour_id=int(ids[best[i, rank]]),
+                    rank=rank + 1,
+                    score=float(best_scores[i, rank]),
+                )
+
+
+def _save(product_ids, neighbours):
+    with transaction.atomic():
+        ProductNeighbour.objects.filter(product_id__in=product_ids).delete()
+        ProductNeighbour.objects.bulk_create(neighbours, batch_size=500)
+
+
+def rebuild(k=TOP_K):
+    """Recomputes neighbours for every product. Returns the number of products processed."""
+    ids, matrix = build_features()
+    neighbours = list(_top_k(ids, matrix, np.arange(len(ids)), k))
+    with transaction.atomic():
+        ProductNeighbour.objects.all().delete()
+        ProductNeighbour.objects.bulk_create(neighbours, batch_size=500)
+    return len(ids)
+
+
+def refresh(changed_ids, k=TOP_K):
+    """
+    Updates neighbours after the given products were saved or deleted. Only
+    rows that can have changed are recomputed: the changed products, products
+    that currently list one of them, products the changed ones now beat, and
+    products whose rows were cut short (or left with a gap in their ranks)
+    by a delete. Price and RAM scaling depend on the whole catalog, so other
+    rows can drift slightly; the compute_recommendations command resets them.
+    Returns the ids of the products whose neighbours were recomputed.
+    """
+    ids, matrix = build_features()
+    if not len(ids):
+        return []
+    k_eff = min(k, len(ids) - 1)
+    position = {int(pid): row for row, pid in enumerate(ids)}
+    changed_rows = [position[pid] for pid in changed_ids if pid in position]
+
+    affected = set(changed_rows)
+    affected.update(
+        position[pid] for pid in ProductNeighbour.objects
+        .filter(neighbour_id__in=changed_ids).values_list('product_id', flat=True)
+        if pid in position
+    )
+
+    current = {
+        row['product_id']: row
+        for row in ProductNeighbour.objects.values('product_id')
+        .annotate(worst=Min('score'), total=Count('id'), last=Max('rank'))
+    }
+    worst = np.full(len(ids), -np.inf, dtype=np.float32)
+    for pid, row in position.items():
+        info = current.get(pid)
+        if info is None or info['total'] != k_eff or info['last'] != k_eff:
+            affected.add(row)
+        else:
+            worst[row] = info['worst']
+
+    if changed_rows:
+        scores = matrix[changed_rows] @ matrix.T
+        scores[np.arange(len(changed_rows)), changed_rows] = -np.inf
+        affected.update(np.nonzero(scores.max(axis=0) > worst)[0].tolist())
+
+    rows = np.array(sorted(affected), dtype=np.int64)
+    product_ids = [int(ids[row]) for row in rows]
+    _save(product_ids, list(_top_k(ids, matrix, rows, k)))
+    return product_ids
@@ -0,0 +1,181 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Min, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, DailyProductSales, DailyCategorySales, DailyCitySales
+
+
+def normalize_city(city):
+    """Cities are typed in by customers, so group ' pune' and 'Pune' together."""
+    return (city or '').strip().title()[:100]
+
+
+def _bump(model, lookup, count, revenue, **details):
+    """Adds to a rollup row, creating it (with `details`) if this is the first sale for the key."""
+    updated = model.objects.filter(**lookup).update(
+        order_count=F('order_count') + count,
+        revenue=F('revenue') + revenue,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(order_count=count, revenue=revenue, **lookup, **details)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**lookup).update(
+            order_count=F('order_count') + count,
+            revenue=F('revenue') + revenue,
+        )
+
+
+def record_order(order):
+    """Adds a newly created order to the daily rollups."""
+    day = timezone.localdate(order.order_date)
+    revenue = order.total_price
+    with transaction.atomic():
+        if order.product_id:
+            product = order.product
+            _bump(DailyProductSales, {'date': day, 'product_id': product.pk}, 1, revenue,
+                  product_name=product.name, category=product.category)
+            _bump(DailyCategorySales, {'date': day, 'category': product.category}, 1, revenue)
+        _bump(DailyCitySales, {'date': day, 'city': normalize_city(order.city)}, 1, revenue)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _aggregate_chunk(start, end):
+    """Aggregates raw orders for [start, end) into rollup rows. Runs in a worker thread."""
+    try:
+        # Bounds on the raw column, so the order_date index is used; an
+        # order_date__date filter is a per-row Python function on SQLite
+        orders = (Order.objects
+                  .filter(order_date__gte=_day_start(start), order_date__lt=_day_start(end))
+                  .annotate(day=TruncDate('order_date')))
+        totals = {'order_count': Count('id'), 'revenue': Sum('total_price')}
+
+        products = [
+            DailyProductSales(
+                date=row['day'], product_id=row['product'], product_name=row['product__name'],
+                category=row['product__category'], **_totals(row),
+            )
+            for row in orders.filter(product__isnull=False)
+            .values('day', 'product', 'product__name', 'product__category').annotate(**totals)
+        ]
+        # Orders of deleted products have no category any more; their share
+        # comes from the product rollups, which outlive the product
+        categories = defaultdict(lambda: [0, Decimal('0')])
+        for row in products:
+            categories[(row.date, row.category)][0] += row.order_count
+            categories[(row.date, row.category)][1] += row.revenue
+        for row in (DailyProductSales.objects
+                    .filter(product__isnull=True, date__gte=start, date__lt=end)
+                    .values('date', 'category').annotate(count=Sum('order_count'), total=Sum('revenue'))):
+            categories[(row['date'], row['category'])][0] += row['count']
+            categories[(row['date'], row['category'])][1] += row['total']
+        categories = [
+            DailyCategorySales(date=day, category=category, order_count=count, revenue=revenue)
+            for (day, category), (count, revenue) in categories.items()
+        ]
+        # City names are normalized in Python, so merge the raw groups here
+        cities = defaultdict(lambda: [0, Decimal('0')])
+        for row in orders.values('day', 'city').annotate(**totals):
+            key = (row['day'], normalize_city(row['city']))
+            cities[key][0] += row['order_count']
+            cities[key][1] += row['revenue'] or 0
+        cities = [
+            DailyCitySales(date=day, city=city, order_count=count, revenue=revenue)
+            for (day, city), (count, revenue) in cities.items()
+        ]
+        return products, categories, cities
+    finally:
+        connection.close()
+
+
+def _totals(row):
+    return {'order_count': row['order_count'], 'revenue': row['revenue'] or 0}
+
+
+def rebuild(since=None, chunk_days=31, workers=4):
+    """
+    Recomputes the rollups from the Order table, from `since` (or the first
+    order) onwards. Rows before that date are left alone, so history from
+    archived orders survives a rebuild, and so are product rows of deleted
+    products, whose orders no longer say what was sold. Returns the number
+    of rollup rows written.
+
+    The rebuild is not serialised against new orders: an order whose rollup
+    update commits after its chunk was aggregated but before the rollups are
+    replaced is lost. Run it while the shop is quiet, or re-run it with
+    --since for the affected days.
+    """
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1.")
+    bounds = Order.objects.aggregate(first=Min('order_date'), last=Max('order_date'))
+    if bounds['first'] is None:
+        return 0
+    start = since or timezone.localdate(bounds['first'])
+    last = timezone.localdate(bounds['last'])
+
+    chunks = []
+    while start <= last:
+        end = start + timedelta(days=chunk_days)
+        chunks.append((start, end))
+        start = end
+
+    if not chunks:
+        # `since` is after the last order: nothing to rebuild
+        return 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda chunk: _aggregate_chunk(*chunk), chunks))
+
+    first_day = chunks[0][0]
+    written = 0
+    with transaction.atomic():
+        for index, model in enumerate((DailyProductSales, DailyCategorySales, DailyCitySales)):
+            stale = model.objects.filter(date__gte=first_day)
+            if model is DailyProductSales:
+                # Rows of deleted products cannot be recomputed from the orders
+                stale = stale.filter(product__isnull=False)
+            stale.delete()
+            rows = [row for result in results for row in result[index]]
+            model.objects.bulk_create(rows, batch_size=500)
+            written += len(rows)
+    return written
+
+
+def sales_summary(days=30, top=10):
+    """Revenue and top-seller figures for the admin dashboard, read only from the rollups."""
+    today = timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    totals = {'total_orders': Sum('order_count'), 'total_revenue': Sum('revenue')}
+
+    # City rollups also cover orders whose product has since been removed
+    periods = [('Today', today), ('Last 7 days', today - timedelta(days=6)), (f'Last {days} days', since), ('All time', None)]
+    revenue = []
+    for label, start in periods:
+        rows = DailyCitySales.objects.all()
+        if start:
+            rows = rows.filter(date__gte=start)
+        revenue.append({'label': label, **rows.aggregate(**totals)})
+
+    recent = {'date__gte': since}
+    return {
+        'summary_days': days,
+        'revenue_periods': revenue,
+        'top_products': (DailyProductSales.objects.filter(**recent)
+                         .values('product_name').annotate(**totals).order_by('-total_revenue')[:top]),
+        'top_categories': (DailyCategorySales.objects.filter(**recent)
+                           .values('category').annotate(**totals).order_by('-total_revenue')[:top]),
+        'top_cities': (DailyCitySales.objects.filter(**recent)
+                       .values('city').annotate(**totals).order_by('-total_revenue')[:top]),
+    }
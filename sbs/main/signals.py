@@ -0,0 +1,127 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Image, Order, Product
+from . import prerender, rollups
+
+logger = logging.getLogger(__name__)
+
+
+def _after_commit(func, description, on_failure=None):
+    """
+    Runs derived-data work after the commit without letting it fail the
+    request: the Order or Product is already saved at that point. If it
+    fails, on_failure gets a chance to drop whatever is now stale.
+    """
+    def run():
+        try:
+            func()
+        except Exception:
+            logger.exception("Failed to %s", description)
+            if on_failure is None:
+                return
+            try:
+                on_failure()
+            except Exception:
+                logger.exception("Failed to clean up after failing to %s", description)
+
+    transaction.on_commit(run, robust=True)
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, created, raw=False, **kwargs):
+    """Keeps the daily sales rollups current as orders come in."""
+    if created and not raw:
+        _after_commit(lambda: rollups.record_order(instance), f"update sales rollups for order {instance.pk}")
+
+
+@receiver(pre_save, sender=Product)
+def remember_old_slug(sender, instance, raw=False, **kwargs):
+    """A changed slug leaves a pre-rendered page behind under the old URL."""
+    if not raw and instance.pk:
+        instance._old_slug = Product.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_product_pages(sender, instance, raw=False, **kwargs):
+    """
+    Recomputes the 'similar devices' rows the product can affect, then
+    re-renders its page, the pages whose recommendations changed, and the catalog.
+    """
+    if raw:
+        return
+    deleted = kwargs.get('signal') is post_delete
+    removed = [instance.slug] if deleted else [getattr(instance, '_old_slug', None)]
+    if not deleted and removed[0] == instance.slug:
+        removed = []
+
+    def refresh():
+        # Imported here so NumPy is not loaded at startup by every worker and command
+        from . import recommendations
+
+        affected = recommendations.refresh([instance.pk])
+        prerender.refresh_products({instance.pk, *affected}, removed_slugs=removed)
+
+    # A stale static page would be served ahead of the view, so drop it instead
+    _after_commit(
+        refresh,
+        f"refresh recommendations and pages for product {instance.pk}",
+        on_failure=lambda: prerender.discard_pages(slugs=[instance.slug, *removed]),
+    )
+
+
+def _gallery_product_ids(image):
+    """Products showing this image: its FK owner plus any linked through Product.images."""
+    ids = set(image.products.values_list('pk', flat=True))
+    if image.product_id:
+        ids.add(image.product_id)
+    return ids
+
+
+def _rerender_galleries(ids):
+    _after_commit(
+        lambda: prerender.refresh_products(ids, catalog=False),
+        f"re-render pages for products {sorted(ids)}",
+        on_failure=lambda: prerender.discard_pages(product_ids=ids, catalog=False),
+    )
+
+
+@receiver(pre_delete, sender=Image)
+def remember_gallery_products(sender, instance, **kwargs):
+    """The Product.images rows are gone by post_delete, so collect them first."""
+    instance._gallery_product_ids = _gallery_product_ids(instance)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def refresh_image_product_pages(sender, instance, raw=False, **kwargs):
+    """Product images appear on the detail pages, so re-render them."""
+    if raw:
+        return
+    ids = getattr(instance, '_gallery_product_ids', None) or _gallery_product_ids(instance)
+    if ids:
+        _rerender_galleries(ids)
+
+
+@receiver(m2m_changed, sender=Product.images.through)
+def refresh_gallery_pages(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-renders detail pages whose gallery gained or lost images."""
+    if action == 'pre_clear':
+        # After the clear there is no way to tell which products were linked
+        if reverse:
+            instance._cleared_product_ids = set(instance.products.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ids = {instance.pk}
+    elif action == 'post_clear':
+        ids = getattr(instance, '_cleared_product_ids', set())
+    else:
+        ids = set(pk_set or ())
+    if ids:
+        _rerender_galleries(ids)
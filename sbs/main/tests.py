@@ -1,3 +1,535 @@
-from django.test import TestCase
+import gzip
+import importlib.util
+import shutil
+import tempfile
+from pathlib import Path
+from io import StringIO
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import transaction
+from django.template import engines
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, get_resolver
+from django.utils import timezone
+
+from .models import (
+    Contacts, DailyCategorySales, DailyCitySales, DailyProductSales, Image, Order, Product, ProductNeighbour,
+)
+from . import archive, prerender, recommendations, rollups, warmup
+
+
+def make_product(name='Dell XPS 13', **fields):
+    defaults = {
+        'brand': 'dell',
+        'category': 'laptop',
+        'price': Decimal('95000.00'),
+        'short_description': 'A laptop',
+        'processor': 'Intel i7',
+        'ram_gb': '16GB',
+        'os': 'windows',
+        'main_image': 'products/1.jpeg',
+    }
+    defaults.update(fields)
+    return Product.objects.create(name=name, **defaults)
+
+
+def make_order(product=None, when=None, **fields):
+    defaults = {
+        'full_name': 'Asha Rao',
+        'email': 'asha@example.com',
+        'phone_number': '9999999999',
+        'street_address': '1 MG Road',
+        'city': 'Pune',
+        'pincode': '411001',
+        'product': product,
+        'total_price': product.price if product else Decimal('100.00'),
+    }
+    defaults.update(fields)
+    order = Order.objects.create(**defaults)
+    if when:
+        # order_date is auto_now_add, so back-date it with an update
+        Order.objects.filter(pk=order.pk).update(order_date=when)
+        order.refresh_from_db()
+    return order
+
+
+def aware(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class TempDirMixin:
+    """Points ARCHIVE_ROOT and PRERENDER_ROOT at a throwaway directory."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        settings_override = override_settings(
+            ARCHIVE_ROOT=f'{self.tmp}/archive',
+            PRERENDER_ROOT=f'{self.tmp}/prerendered',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class SessionTests(TempDirMixin, TestCase):
+    def assertSessionUntouched(self, response):
+        session = response.wsgi_request.session
+        self.assertFalse(session.accessed)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse(Session.objects.exists())
+
+    def test_anonymous_catalog_request_touches_no_session(self):
+        make_product()
+
+        response = self.client.get('/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertSessionUntouched(response)
+
+    def test_flash_message_redirect_touches_no_session(self):
+        response = self.client.post('/contact/', {
+            'name': 'Ravi', 'email': 'ravi@example.com', 'subject': 'Hi', 'message': 'Hello',
+        })
+        self.assertRedirects(response, '/contact/', fetch_redirect_response=False)
+        self.assertSessionUntouched(response)
+        self.assertIn('messages', response.cookies)
+
+        response = self.client.get('/contact/')
+        self.assertContains(response, 'Thank you for reaching out')
+        self.assertSessionUntouched(response)
+
+    def test_purge_deletes_only_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for i in range(7):
+            Session.objects.create(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1))
+        for i in range(3):
+            Session.objects.create(session_key=f'live{i}', session_data='', expire_date=now + timedelta(days=1))
+
+        out = StringIO()
+        call_command('purge_sessions', batch_size=2, pause=0, stdout=out)
+
+        self.assertIn('Deleted 7 expired sessions', out.getvalue())
+        self.assertEqual(sorted(Session.objects.values_list('session_key', flat=True)), ['live0', 'live1', 'live2'])
+
+    def test_purge_rejects_batch_size_below_one(self):
+        for size in (0, -1):
+            with self.assertRaises(CommandError):
+                call_command('purge_sessions', batch_size=size)
+
+
+class AdminChangelistTests(TestCase):
+    # Each page: session, user, one COUNT(*) for the filtered rows, and the page itself
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.dell = make_product()
+        self.apple = make_product('MacBook Air', brand='Apple', os='macos')
+        self.orders = [make_order(self.dell) for _ in range(3)]
+        self.other = make_order(self.apple, full_name='Ravi Kumar', email='ravi@example.com')
+
+    def changelist(self, model, queries, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(f'/admin/main/{model}/', params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_order_searches(self):
+        self.assertEqual(len(self.changelist('order', 4)), 4)
+        self.assertEqual(self.changelist('order', 4, q=str(self.other.pk)), [self.other])
+        self.assertEqual(self.changelist('order', 4, q='RAVI@example.com'), [self.other])
+        self.assertEqual(self.changelist('order', 4, q='ravi'), [self.other])
+        # Not a number, so it only goes through the email and name lookups
+        self.assertEqual(self.changelist('order', 4, q='abc'), [])
+
+    def test_product_search_and_brand_filter(self):
+        # Plus one SELECT DISTINCT for the brand choices, as the test cache is not shared
+        self.assertEqual(self.changelist('product', 5, q='mac'), [self.apple])
+        self.assertEqual(self.changelist('product', 5, brand='dell'), [self.dell])
+        self.assertEqual(self.changelist('product', 5, brand='Apple', q='dell'), [])
+
+    def test_storefront_brand_filter_stays_case_sensitive(self):
+        # NOCASE is only on the admin search indexes, not on the column
+        response = self.client.get('/', {'brand': 'Apple'})
+        self.assertEqual(list(response.context['devices']), [self.apple])
+        self.assertIsNone(response.context['fallback_message'])
+        response = self.client.get('/', {'brand': 'apple'})
+        self.assertIsNotNone(response.context['fallback_message'])
+
+    def test_sales_dashboard(self):
+        with self.assertNumQueries(11):
+            response = self.client.get('/admin/main/dailyproductsales/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Top products')
+
+
+class ArchiveTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+        self.old = [
+            make_order(self.product, aware(2024, 1, 10), email='old@example.com'),
+            make_order(self.product, aware(2024, 1, 20)),
+            make_order(self.product, aware(2024, 2, 5)),
+        ]
+        self.recent = make_order(self.product, aware(2024, 6, 1))
+
+    def test_archives_old_rows_by_month_and_deletes_them(self):
+        total = archive.archive_model('orders', aware(2024, 3, 1), batch_size=2)
+
+        self.assertEqual(total, 3)
+        self.assertEqual(list(Order.objects.values_list('pk', flat=True)), [self.recent.pk])
+        files = archive.load_manifest()['orders']['files']
+        self.assertEqual(sorted(files), ['2024-01', '2024-02'])
+        self.assertEqual(files['2024-01']['rows'], 2)
+
+    def test_lookups(self):
+        archive.archive_model('orders', aware(2024, 3, 1))
+
+        row = archive.find_order(self.old[2].pk)
+        self.assertEqual(row['product__name'], self.product.name)
+        self.assertEqual(row['total_price'], '95000.00')
+        self.assertIsNone(archive.find_order(self.recent.pk))
+        matches = archive.find_by_email('OLD@example.com')
+        self.assertEqual([r['id'] for r in matches['orders']], [self.old[0].pk])
+        self.assertEqual(matches['contacts'], [])
+
+    def test_email_lookup_only_reads_matching_months(self):
+        archive.archive_model('orders', aware(2024, 3, 1))
+
+        with mock.patch.object(archive, 'iter_archive', wraps=archive.iter_archive) as reader:
+            matches = archive.find_by_email(' Old@Example.com ', 'orders')
+            self.assertEqual(archive.find_by_email('nobody@example.com', 'orders'), {'orders': []})
+
+        self.assertEqual([r['id'] for r in matches['orders']], [self.old[0].pk])
+        self.assertEqual([c.args[1] for c in reader.call_args_list], [['2024-01'], []])
+
+    def test_command_rejects_batch_size_below_one(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_records', before='2024-03-01', batch_size=0)
+
+    def test_resume_drops_torn_batch(self):
+        archive.archive_model('orders', aware(2024, 1, 15))
+        path = archive.archive_root() / 'orders' / '2024-01.jsonl.gz'
+        # A crash halfway through appending the next batch
+        with open(path, 'ab') as f:
+            f.write(gzip.compress(b'{"columns": {"id": [999]}}\n')[:12])
+
+        self.assertEqual([r['id'] for r in archive.iter_archive('orders')], [self.old[0].pk])
+
+        archive.archive_model('orders', aware(2024, 3, 1))
+        self.assertEqual(
+            sorted(r['id'] for r in archive.iter_archive('orders')),
+            [order.pk for order in self.old],
+        )
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_resume_deletes_rows_written_before_crash(self):
+        archive.archive_model('orders', aware(2024, 1, 15))
+        manifest = archive.load_manifest()
+        # Rows were written and recorded, but the delete never happened
+        manifest['orders']['pending_ids'] = [self.old[1].pk]
+        archive._save_manifest(manifest)
+
+        archive.archive_model('orders', aware(2024, 1, 15))
+
+        self.assertFalse(Order.objects.filter(pk=self.old[1].pk).exists())
+        self.assertEqual(archive.load_manifest()['orders']['pending_ids'], [])
+
+    def test_contacts(self):
+        contact = Contacts.objects.create(name='Ravi', email='ravi@example.com', subject='Hi', message='Hello')
+        Contacts.objects.filter(pk=contact.pk).update(submitted_at=aware(2024, 1, 1))
+
+        archive.archive_model('contacts', aware(2024, 3, 1))
+
+        self.assertFalse(Contacts.objects.exists())
+        self.assertEqual(archive.find_by_email('ravi@example.com', 'contacts')['contacts'][0]['subject'], 'Hi')
+
+
+def rollup_snapshot():
+    return {
+        model.__name__: sorted(model.objects.values_list(*fields, 'order_count', 'revenue'))
+        for model, fields in (
+            (DailyProductSales, ('date', 'product_id')),
+            (DailyCategorySales, ('date', 'category')),
+            (DailyCitySales, ('date', 'city')),
+        )
+    }
+
+
+class SalesRollupTests(TempDirMixin, TransactionTestCase):
+    # rebuild() aggregates in worker threads, which cannot see rows inside a TestCase transaction
+
+    def setUp(self):
+        super().setUp()
+        self.laptop = make_product()
+        self.phone = make_product('Pixel 9', brand='google', category='smartphone', price=Decimal('70000.00'))
+        self.orders = [
+            make_order(self.laptop, aware(2024, 1, 10, 9), city='Pune'),
+            make_order(self.laptop, aware(2024, 1, 10, 18), city=' pune '),
+            make_order(self.phone, aware(2024, 1, 10, 12), city='Mumbai'),
+            make_order(self.phone, aware(2024, 2, 3, 12), city='Mumbai'),
+            make_order(None, aware(2024, 2, 3, 13), city='Delhi'),
+        ]
+        # Creating them already counted them under today's date; start from empty
+        for model in (DailyProductSales, DailyCategorySales, DailyCitySales):
+            model.objects.all().delete()
+
+    def test_incremental_updates_match_rebuild(self):
+        for order in self.orders:
+            rollups.record_order(order)
+        incremental = rollup_snapshot()
+
+        written = rollups.rebuild(chunk_days=7, workers=2)
+
+        self.assertEqual(written, sum(len(rows) for rows in incremental.values()))
+        self.assertEqual(rollup_snapshot(), incremental)
+        pune = DailyCitySales.objects.get(date=date(2024, 1, 10), city='Pune')
+        self.assertEqual((pune.order_count, pune.revenue), (2, Decimal('190000.00')))
+
+    def test_new_order_updates_rollups_after_commit(self):
+        with transaction.atomic():
+            order = make_order(self.laptop, city='Nagpur')
+            self.assertFalse(DailyCitySales.objects.filter(city='Nagpur').exists())
+
+        day = timezone.localdate(order.order_date)
+        row = DailyProductSales.objects.get(date=day, product=self.laptop)
+        self.assertEqual((row.order_count, row.revenue), (1, self.laptop.price))
+        self.assertTrue(DailyCitySales.objects.filter(date=day, city='Nagpur').exists())
+
+    def test_deleted_product_keeps_its_history_through_rebuild(self):
+        for order in self.orders:
+            rollups.record_order(order)
+        self.phone.delete()
+
+        rollups.rebuild(chunk_days=7, workers=2)
+
+        row = DailyProductSales.objects.get(date=date(2024, 1, 10), product=None)
+        self.assertEqual((row.product_name, row.category, row.order_count), ('Pixel 9', 'smartphone', 1))
+        phones = DailyCategorySales.objects.filter(category='smartphone')
+        self.assertEqual(sorted(phones.values_list('date', 'order_count')), [(date(2024, 1, 10), 1), (date(2024, 2, 3), 1)])
+        self.assertEqual(
+            sum(DailyProductSales.objects.values_list('revenue', flat=True)),
+            sum(DailyCategorySales.objects.values_list('revenue', flat=True)),
+        )
+
+    def test_rebuild_since_keeps_earlier_rows(self):
+        DailyCitySales.objects.create(date=date(2023, 12, 31), city='Archived', order_count=5, revenue=500)
+
+        rollups.rebuild(since=date(2024, 1, 1))
+
+        self.assertTrue(DailyCitySales.objects.filter(city='Archived').exists())
+        self.assertEqual(rollups.rebuild(since=date(2030, 1, 1)), 0)
+
+    def test_rebuild_rejects_empty_chunks(self):
+        with self.assertRaises(ValueError):
+            rollups.rebuild(chunk_days=0)
+
+
+def load_gunicorn_config():
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', Path(settings.BASE_DIR) / 'gunicorn.conf.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        self.loader = engines['django'].engine.template_loaders[0]
+        self.loader.reset()
+        clear_url_caches()
+        self.addCleanup(clear_url_caches)
+
+    def test_warm_up_fills_template_and_url_caches(self):
+        make_product()
+        out = StringIO()
+
+        warmup.warm_up(stdout=out)
+
+        self.assertIn('main/index.html', self.loader.get_template_cache)
+        self.assertIn('main/detail.html', self.loader.get_template_cache)
+        self.assertTrue(get_resolver()._populated)
+        self.assertIn('catalog pages rendered: 2', out.getvalue())
+
+    def test_post_fork_logs_failure_and_lets_worker_boot(self):
+        worker = mock.Mock(pid=1234)
+
+        with mock.patch.object(warmup, 'warm_up', side_effect=RuntimeError('no such table')):
+            load_gunicorn_config().post_fork(server=mock.Mock(), worker=worker)
+
+        worker.log.exception.assert_called_once()
+        self.assertIn('start cold', worker.log.exception.call_args.args[0])
+
+    def test_post_fork_warms_the_worker(self):
+        worker = mock.Mock(pid=1234)
+
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            load_gunicorn_config().post_fork(server=mock.Mock(), worker=worker)
+
+        warm_up.assert_called_once_with()
+        worker.log.exception.assert_not_called()
+
+
+def neighbour_snapshot():
+    return sorted(ProductNeighbour.objects.values_list('product_id', 'rank', 'neighbour_id'))
+
+
+class RecommendationTests(TempDirMixin, TestCase):
+    # Signal callbacks run on commit, which never happens inside a TestCase,
+    # so each test drives refresh()/rebuild() directly.
+
+    def setUp(self):
+        super().setUp()
+        specs = [
+            ('Dell XPS 13', 'dell', 'laptop', '95000', '16GB', 'windows'),
+            ('Dell Inspiron', 'dell', 'laptop', '55000', '8GB', 'windows'),
+            ('MacBook Air', 'apple', 'laptop', '110000', '16GB', 'macos'),
+            ('HP Envy Desktop', 'hp', 'desktop', '75000', '32GB', 'windows'),
+            ('iPad Air', 'apple', 'tablet', '60000', '8GB', 'ios'),
+            ('Pixel 9', 'google', 'smartphone', '70000', '12GB', 'android'),
+            ('Logitech MX Keys', 'logitech', 'accessory', '9000', '', 'other'),
+        ]
+        self.products = [
+            make_product(name, brand=brand, category=category, price=Decimal(price), ram_gb=ram, os=os_name)
+            for name, brand, category, price, ram, os_name in specs
+        ]
+        recommendations.rebuild(k=3)
+
+    def test_rebuild_stores_ranked_neighbours(self):
+        xps = self.products[0]
+        neighbours = list(ProductNeighbour.objects.filter(product=xps))
+        self.assertEqual([n.rank for n in neighbours], [1, 2, 3])
+        self.assertEqual(neighbours[0].neighbour, self.products[1])
+        self.assertNotIn(xps.pk, [n.neighbour_id for n in neighbours])
+        self.assertEqual([n.score for n in neighbours], sorted((n.score for n in neighbours), reverse=True))
+
+    def test_refresh_after_update_matches_rebuild(self):
+        # Categorical change only, so price/RAM scaling stays the same as in a full rebuild
+        ipad = self.products[4]
+        Product.objects.filter(pk=ipad.pk).update(category='laptop', os='macos')
+
+        affected = recommendations.refresh([ipad.pk], k=3)
+        refreshed = neighbour_snapshot()
+        recommendations.rebuild(k=3)
+
+        self.assertIn(ipad.pk, affected)
+        self.assertEqual(refreshed, neighbour_snapshot())
+
+    def test_refresh_after_delete_fills_gaps(self):
+        deleted = self.products[1]
+        deleted.delete()
+
+        recommendations.refresh([deleted.pk], k=3)
+
+        self.assertFalse(ProductNeighbour.objects.filter(neighbour_id=deleted.pk).exists())
+        for product in self.products[:1] + self.products[2:]:
+            ranks = list(ProductNeighbour.objects.filter(product=product).values_list('rank', flat=True))
+            self.assertEqual(ranks, [1, 2, 3])
+
+    def test_detail_page_lists_similar_products(self):
+        response = self.client.get(f'/device/{self.products[0].slug}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['similar_products'][0], self.products[1])
+        self.assertContains(response, 'Similar Devices')
+
+
+class PrerenderTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.xps = make_product()
+        self.mac = make_product('MacBook Air', brand='apple', os='macos')
+        self.root = Path(self.tmp) / 'prerendered'
+
+    def page(self, slug=None):
+        path = self.root / 'device' / slug / 'index.html' if slug else self.root / 'index.html'
+        return path.read_text() if path.exists() else None
+
+    def test_render_all_and_serve_before_views(self):
+        # render_all() renders in worker threads, which cannot see this test's transaction
+        prerender.render_catalog()
+        prerender.render_product(self.xps.slug)
+
+        response = self.client.get(f'/device/{self.xps.slug}/')
+        self.assertIn(b'Dell XPS 13', b''.join(response.streaming_content))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertEqual(response['Vary'], 'Cookie')
+        self.assertNotIn('Access-Control-Allow-Origin', response)
+        self.assertTrue(hasattr(self.client.get('/'), 'streaming_content'))
+
+        # Filters and pending flash messages need the dynamic view
+        self.assertFalse(hasattr(self.client.get('/?category=laptop'), 'streaming_content'))
+        self.client.cookies['messages'] = 'pending'
+        self.assertFalse(hasattr(self.client.get('/'), 'streaming_content'))
+
+    def test_product_save_rerenders_its_page_and_catalog(self):
+        old_slug = self.xps.slug
+        with self.captureOnCommitCallbacks(execute=True):
+            self.xps.name = 'Dell XPS 13 Plus'
+            self.xps.slug = 'dell-xps-13-plus'
+            self.xps.save()
+
+        self.assertIn('Dell XPS 13 Plus', self.page('dell-xps-13-plus'))
+        self.assertIn('Dell XPS 13 Plus', self.page())
+        self.assertIsNone(self.page(old_slug))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.xps.delete()
+        self.assertIsNone(self.page('dell-xps-13-plus'))
+        self.assertNotIn('Dell XPS 13 Plus', self.page())
+
+    def test_image_changes_rerender_every_gallery_showing_it(self):
+        image = Image.objects.create(product=self.xps, image='products/2.jpeg')
+        # The gallery comes from the Product.images M2M, which can link other products
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mac.images.add(image)
+        self.assertIn('/media/products/2.jpeg', self.page(self.mac.slug))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = 'products/3.jpeg'
+            image.save()
+        self.assertIn('/media/products/3.jpeg', self.page(self.mac.slug))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertNotIn('/media/products/3.jpeg', self.page(self.mac.slug))
+
+    def test_render_failure_does_not_fail_the_save(self):
+        prerender.render_catalog()
+        prerender.render_product(self.mac.slug)
+        prerender.render_product(self.xps.slug)
+
+        with mock.patch.object(prerender, 'refresh_products', side_effect=OSError('disk full')):
+            with self.assertLogs('main.signals', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.mac.price = Decimal('99000.00')
+                    self.mac.save()
+        self.assertEqual(Product.objects.get(pk=self.mac.pk).price, Decimal('99000.00'))
+        # The stale copies are gone, so the views answer with the new price
+        self.assertIsNone(self.page(self.mac.slug))
+        self.assertIsNone(self.page())
+        self.assertIsNotNone(self.page(self.xps.slug))
+        self.assertContains(self.client.get(f'/device/{self.mac.slug}/'), '99000.00')
+
+
+class RenderAllTests(TempDirMixin, TransactionTestCase):
+    # render_all() renders in worker threads, which cannot see rows inside a TestCase transaction
+
+    def test_render_all_removes_pages_of_missing_slugs(self):
+        xps = make_product()
+        prerender.render_all(workers=2)
+        # Neither update() nor a fixture load sends the signals that drop old pages
+        Product.objects.filter(pk=xps.pk).update(slug='dell-xps-13-new')
+
+        written = prerender.render_all(workers=2)
+
+        pages = Path(self.tmp) / 'prerendered' / 'device'
+        self.assertEqual(written, 2)
+        self.assertEqual(sorted(p.name for p in pages.iterdir()), ['dell-xps-13-new'])
+        self.assertEqual(self.client.get(f'/device/{xps.slug}/').status_code, 404)
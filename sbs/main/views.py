@@ -1,7 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponse
 from django.db.models import Q
-from .models import Product, Order
+from .models import Product, Order, ProductNeighbour
 from .forms import ContactForm, CheckoutForm
 from django.contrib import messages
 from django.conf import settings
@@ -167,9 +167,15 @@ def device_detail(request, slug):
         if img.image and img.image.url not in image_urls:
             image_urls.append(img.image.url)
 
+    # Precomputed by main.recommendations, so this is one indexed query
+    similar_products = [
+        n.neighbour for n in ProductNeighbour.objects.filter(product=product).select_related('neighbour')
+    ]
+
     context = {
         'product': product,
         'image_urls': image_urls,
+        'similar_products': similar_products,
     }
     return render(request, 'main/detail.html', context)
 
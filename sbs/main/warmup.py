@@ -0,0 +1,68 @@
+import time
+from pathlib import Path
+
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.test import RequestFactory
+from django.urls import get_resolver, reverse
+
+from .models import Product
+
+
+def _populate_urls():
+    resolver = get_resolver()
+    # Building the reverse dict also imports every URLconf, including the admin's
+    resolver.reverse_dict
+    reverse('main:device_list')
+    return len(resolver.url_patterns)
+
+
+def _compile_templates():
+    """Loads every template once so the cached loader holds the compiled version."""
+    count = 0
+    for engine in engines.all():
+        for directory in getattr(engine, 'template_dirs', ()):
+            directory = Path(directory)
+            for path in directory.rglob('*.html'):
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                    count += 1
+                except (TemplateDoesNotExist, TemplateSyntaxError):
+                    pass
+    return count
+
+
+def _open_connections():
+    for alias in connections:
+        connections[alias].ensure_connection()
+    return len(connections.all())
+
+
+def _prime_catalog(detail_pages=20):
+    """Renders the catalog and the first few detail pages so the DB pages and render path are hot."""
+    from . import views
+
+    factory = RequestFactory()
+    views.device_list(factory.get(reverse('main:device_list')))
+    slugs = list(Product.objects.exclude(slug='').values_list('slug', flat=True)[:detail_pages])
+    for slug in slugs:
+        views.device_detail(factory.get(reverse('main:device_detail', args=[slug])), slug=slug)
+    return len(slugs) + 1
+
+
+def warm_up(stdout=None):
+    """
+    Does the work the first requests after a deploy would otherwise pay for.
+    Called by the `warmup` management command and gunicorn's post_fork hook.
+    """
+    steps = [
+        ('URL patterns', _populate_urls),
+        ('templates compiled', _compile_templates),
+        ('DB connections', _open_connections),
+        ('catalog pages rendered', _prime_catalog),
+    ]
+    for label, step in steps:
+        started = time.perf_counter()
+        result = step()
+        if stdout:
+            stdout.write(f"  {label}: {result} ({(time.perf_counter() - started) * 1000:.0f} ms)")
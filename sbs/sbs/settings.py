@@ -1,10 +1,12 @@
 import os
 from pathlib import Path
-from dotenv import load_dotenv # type: ignore
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-load_dotenv(os.path.join(BASE_DIR, '.env'))
+# Only pay for python-dotenv when there is actually a .env file to read
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv # type: ignore
+    load_dotenv(os.path.join(BASE_DIR, '.env'))
 
 
 # SECRET_KEY = 'django-insecure-l7dtix(%t6&ha6%1@vx$mylamrnlcvi+%pi^q*s19#faeyanta'
@@ -27,13 +29,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Static files and pre-rendered pages are answered before any other middleware runs
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'main.middleware.PrerenderedPageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'sbs.urls'
@@ -97,6 +101,12 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Archived Orders/Contacts (see main/archive.py)
+ARCHIVE_ROOT = os.environ.get('ARCHIVE_ROOT', BASE_DIR / 'archive')
+
+# Pre-rendered catalog/product pages (see main/prerender.py)
+PRERENDER_ROOT = os.environ.get('PRERENDER_ROOT', BASE_DIR / 'prerendered')
+
 
 # Security settings
 # SECURE_SSL_REDIRECT = True
@@ -108,6 +118,31 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache
+# Without CACHES, Django uses a per-process LocMemCache, which every gunicorn
+# worker would hold its own copy of. Set REDIS_URL to share one cache.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+
+# Sessions & messages
+# Flash messages live in a signed cookie, so anonymous visitors never touch
+# session storage. Sessions themselves are only needed for admin logins.
+# They are only read through the cache when that cache is shared: with a
+# per-worker cache, a logout in one worker would leave the session alive in the others.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if REDIS_URL else 'django.contrib.sessions.backends.db',
+)
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')  
 EMAIL_HOST = os.environ.get('EMAIL_HOST','smtp.gmail.com')
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')